@@ -7,16 +7,24 @@ service falls back to a local pickled artifact (useful for local development).
 
 from __future__ import annotations
 
+from functools import lru_cache
 from pathlib import Path
+from typing import Any, List, Tuple
+import mmap
 import os
 import logging
-import joblib
+import pickle
 
-import mlflow
+import numpy as np
 import pandas as pd
 from fastapi import FastAPI, HTTPException
 
-from src.api.pydantic_models import PredictionResponse, Transaction
+from src.api.pydantic_models import (
+    BatchRequest,
+    BatchResponse,
+    PredictionResponse,
+    Transaction,
+)
 from src.data_processing import engineer_features
 
 logger = logging.getLogger(__name__)
@@ -29,16 +37,178 @@ MLFLOW_TRACKING_URI = os.getenv("MLFLOW_TRACKING_URI")
 MLFLOW_MODEL_NAME = os.getenv("MLFLOW_MODEL_NAME", "credit-risk-best")
 MLFLOW_MODEL_STAGE = os.getenv("MLFLOW_MODEL_STAGE", "Production")
 
+# Opt-in pre-converted ONNX model for the local artifact; without it the loaded
+# sklearn model is converted at startup
+ONNX_MODEL_PATH = os.getenv("ONNX_MODEL_PATH")
+
+# joblib-compressed artifacts start with one of these headers, and uncompressed
+# joblib dumps embed numpy arrays through NumpyArrayWrapper; plain pickle
+# reads neither
+_JOBLIB_MAGIC = (
+    b"ZF",
+    b"\x78",
+    b"\x1f\x8b",
+    b"BZh",
+    b"\xfd7zXZ",
+    b"\x5d\x00\x00",
+)
+_JOBLIB_MARKER = b"NumpyArrayWrapper"
+
 app = FastAPI(
     title="Credit Risk Scoring API",
     version="1.0.0",
 )
 
 
+def _dummy_transaction(transaction_id: str = "") -> Transaction:
+    """Return an all-zero transaction used to probe the scoring path."""
+    return Transaction(
+        TransactionId=transaction_id,
+        CountryCode=0,
+        Amount=0.0,
+        Value=0.0,
+        PricingStrategy=0,
+    )
+
+
+def _discover_feature_cols(model) -> tuple[str, ...]:
+    """Return the numeric feature columns, in the order the model expects.
+
+    Models fitted on a DataFrame expose ``feature_names_in_``; otherwise the
+    order is discovered by running ``engineer_features`` on a dummy row.
+    """
+    # NOTE: for models without feature_names_in_ the column order is the
+    # declaration order of the Transaction fields, so reordering those
+    # pydantic fields silently reorders the model's features
+    names = getattr(model, "feature_names_in_", None)
+    if names is not None:
+        return tuple(str(c) for c in names)
+
+    dummy = _dummy_transaction().model_dump()
+    dummy["FraudResult"] = 0
+    X, _ = engineer_features(pd.DataFrame([dummy]))
+    return tuple(X.select_dtypes(include=["number"]).columns)
+
+
+def _build_onnx_session(model, n_features: int, onnx_path: Path | None):
+    """Return a validated ONNX Runtime session for ``model``, or None.
+
+    Reads ``onnx_path`` when given, otherwise converts the sklearn model with
+    skl2onnx. Both packages are optional. The session must accept
+    ``n_features`` float32 columns and return an (n, 2) probability output;
+    any failure keeps the service on sklearn's ``predict_proba``.
+    """
+    try:
+        import onnxruntime as ort
+    except ImportError:
+        return None
+
+    try:
+        if onnx_path is not None:
+            onx = onnx_path.read_bytes()
+        else:
+            from skl2onnx import convert_sklearn
+            from skl2onnx.common.data_types import FloatTensorType
+
+            # disable ZipMap so probabilities come back as an (n, 2) array
+            clf = model.steps[-1][1] if hasattr(model, "steps") else model
+            onx = convert_sklearn(
+                model,
+                initial_types=[("X", FloatTensorType([None, n_features]))],
+                options={id(clf): {"zipmap": False}},
+            ).SerializeToString()
+        sess = ort.InferenceSession(onx, providers=["CPUExecutionProvider"])
+
+        width = sess.get_inputs()[0].shape[-1]
+        if isinstance(width, int) and width != n_features:
+            raise ValueError(
+                f"ONNX model takes {width} features, expected {n_features}"
+            )
+        probe = np.zeros((1, n_features), dtype=np.float32)
+        _onnx_probs(sess, probe)
+        return sess
+    except Exception as exc:
+        logger.warning("ONNX Runtime unavailable, using sklearn: %s", exc)
+        return None
+
+
+def _onnx_probs(sess, X: np.ndarray) -> np.ndarray:
+    """Return positive-class probabilities from an ONNX Runtime session."""
+    # second output holds class probabilities for sklearn classifiers
+    outputs = sess.run(None, {sess.get_inputs()[0].name: X})
+    probs = np.asarray(outputs[1], dtype=np.float64)
+    if probs.shape != (X.shape[0], 2):
+        raise ValueError(f"unexpected ONNX probability shape {probs.shape}")
+    return probs[:, 1]
+
+
+def _load_local_model(path: Path) -> Any:
+    """Unpickle a local artifact straight from a memory map.
+
+    Artifacts written by ``joblib.dump`` are delegated to ``joblib.load``.
+    """
+    with open(path, "rb") as f, mmap.mmap(
+        f.fileno(), 0, access=mmap.ACCESS_READ
+    ) as buf:
+        if buf[:6].startswith(_JOBLIB_MAGIC) or buf.find(_JOBLIB_MARKER) != -1:
+            import joblib  # deferred: only needed for joblib-written artifacts
+
+            return joblib.load(path)
+        return pickle.loads(buf)
+
+
 @app.on_event("startup")
 def load_model() -> None:
+    """Load the model and cache its feature column order at startup."""
+    # idempotent: a repeated startup event (or re-import) reuses the model
+    if getattr(app.state, "model", None) is not None:
+        return
+
+    app.state.model, app.state.model_source = get_model()
+    app.state.FEATURE_COLS = _discover_feature_cols(app.state.model)
+    logger.info("Model expects %d features", len(app.state.FEATURE_COLS))
+
+    # every model feature must come from the request; never score a guess
+    missing = set(app.state.FEATURE_COLS) - set(Transaction.model_fields)
+    if missing:
+        raise RuntimeError(
+            "Model expects features not declared on Transaction: "
+            f"{sorted(missing)}"
+        )
+    # the name check above cannot catch a width mismatch for models fitted
+    # on unnamed arrays, whose columns come from Transaction itself
+    n_expected = getattr(app.state.model, "n_features_in_", None)
+    if n_expected is not None and n_expected != len(app.state.FEATURE_COLS):
+        raise RuntimeError(
+            f"Model expects {n_expected} features, but Transaction provides "
+            f"{len(app.state.FEATURE_COLS)}: {list(app.state.FEATURE_COLS)}"
+        )
+
+    # a pre-converted file only ever stands in for the local artifact, so it
+    # cannot shadow a model loaded from the registry
+    onnx_path = None
+    if ONNX_MODEL_PATH and app.state.model_source == str(MODEL_PATH):
+        onnx_path = Path(ONNX_MODEL_PATH)
+    app.state.ort_sess = _build_onnx_session(
+        app.state.model, len(app.state.FEATURE_COLS), onnx_path
+    )
+    if app.state.ort_sess is not None:
+        logger.info("Serving predictions with ONNX Runtime")
+
+    # warm up the full scoring path so the first request does not pay for
+    # lazy initialisation inside the model
+    try:
+        _score_transactions([_dummy_transaction("warmup")])
+        app.state.warmed = True
+    except Exception as exc:
+        logger.warning("Model warmup failed: %s", exc)
+        app.state.warmed = False
+
+
+@lru_cache(maxsize=1)
+def get_model() -> Tuple[Any, str]:
     """
-    Load trained model at application startup.
+    Load the trained model once per process and return ``(model, source)``.
 
     Logic:
     1. If MLFLOW_TRACKING_URI is provided, attempt to load the model from the MLflow
@@ -50,8 +220,12 @@ def load_model() -> None:
     The code prefers the registry model (so you can deploy model updates centrally via MLflow)
     but remains usable for local/dev workflows where a local artifact is available.
     """
-    # configure mlflow tracking uri if provided
+    # configure mlflow tracking uri if provided; mlflow is imported lazily so
+    # workers serving a local artifact never pay for it
     if MLFLOW_TRACKING_URI:
+        import mlflow
+        import mlflow.sklearn
+
         logger.info("Setting MLflow tracking URI to %s", MLFLOW_TRACKING_URI)
         mlflow.set_tracking_uri(MLFLOW_TRACKING_URI)
 
@@ -61,10 +235,9 @@ def load_model() -> None:
         try:
             logger.info("Attempting to load model from registry: %s", model_uri)
             # load as sklearn model to preserve predict_proba when available
-            app.state.model = mlflow.sklearn.load_model(model_uri)
-            app.state.model_source = model_uri
+            model = mlflow.sklearn.load_model(model_uri)
             logger.info("Loaded model from MLflow Model Registry: %s", model_uri)
-            return
+            return model, model_uri
         except Exception as exc:  # fallback to local file
             logger.warning(
                 "Failed to load model from MLflow registry (%s): %s", model_uri, exc
@@ -73,10 +246,9 @@ def load_model() -> None:
     # fallback: load a local artifact
     if MODEL_PATH.exists():
         logger.info("Loading local model from %s", MODEL_PATH)
-        app.state.model = joblib.load(MODEL_PATH)
-        app.state.model_source = str(MODEL_PATH)
+        model = _load_local_model(MODEL_PATH)
         logger.info("Loaded local model from %s", MODEL_PATH)
-        return
+        return model, str(MODEL_PATH)
 
     # If we reach here we couldn't load a model
     raise RuntimeError(
@@ -95,39 +267,76 @@ def model_info():
     return {"model_source": getattr(app.state, "model_source", "unknown")}
 
 
-@app.post("/predict", response_model=PredictionResponse)
-def predict_risk(tx: Transaction):
-    """
-    Predict credit risk probability for a single transaction.
-    """
+def _score_transactions(txs: List[Transaction]) -> List[float]:
+    """Score transactions in one model call; shared by both endpoints."""
     if not hasattr(app.state, "model"):
         raise HTTPException(status_code=500, detail="Model not loaded")
-
-    # Convert request → DataFrame
-    df = pd.DataFrame([tx.dict()])
-
-    # Feature engineering (same logic as training)
-    X, _ = engineer_features(df)
+    if not txs:
+        return []
 
     model = app.state.model
+    cols = app.state.FEATURE_COLS
 
-    # Prefer predict_proba if available (common for sklearn classifiers).
-    try:
-        probs = model.predict_proba(X)
-        risk_prob = float(probs[:, 1][0])
-    except Exception:
-        # Some mlflow pyfunc models expose a `predict` that returns probabilities.
-        preds = model.predict(X)
-        # preds may be (n_samples, 2) or (n_samples,) depending on model flavor
+    # Build the feature matrix directly; no per-request DataFrame unless the
+    # model was fitted on named columns
+    arr = np.fromiter(
+        (tx.__dict__[c] for tx in txs for c in cols),
+        dtype=np.float32,
+        count=len(txs) * len(cols),
+    ).reshape(len(txs), len(cols))
+
+    probs = None
+    sess = getattr(app.state, "ort_sess", None)
+    if sess is not None:
         try:
-            if hasattr(preds, "ndim") and preds.ndim == 2:
-                risk_prob = float(preds[0, 1])
-            else:
-                risk_prob = float(preds[0])
+            probs = _onnx_probs(sess, arr)
         except Exception as exc:
-            raise HTTPException(status_code=500, detail=f"Model prediction failed: {exc}")
+            # stop retrying a broken session on every request
+            logger.warning("ONNX Runtime failed, using sklearn: %s", exc)
+            app.state.ort_sess = None
+
+    if probs is None:
+        X = arr
+        if hasattr(model, "feature_names_in_"):
+            X = pd.DataFrame(arr, columns=list(cols))
+
+        # Prefer predict_proba if available (common for sklearn classifiers).
+        try:
+            probs = np.asarray(model.predict_proba(X))[:, 1]
+        except Exception:
+            # Some mlflow pyfunc models expose a `predict` that returns
+            # probabilities.
+            preds = model.predict(X)
+            # preds may be (n_samples, 2) or (n_samples,) depending on
+            # model flavor
+            try:
+                preds = np.asarray(preds, dtype=np.float64)
+                probs = preds[:, 1] if preds.ndim == 2 else preds.reshape(-1)
+            except Exception as exc:
+                raise HTTPException(
+                    status_code=500, detail=f"Model prediction failed: {exc}"
+                )
+
+    # clamp to [0,1] in place on a buffer we own; model outputs may be
+    # strided or read-only (e.g. a pandas Series under copy-on-write)
+    probs = np.array(probs, dtype=np.float64, order="C")
+    np.clip(probs, 0.0, 1.0, out=probs)
+    return probs.tolist()
 
-    # clamp to [0,1]
-    risk_prob = max(0.0, min(1.0, risk_prob))
 
+@app.post("/predict", response_model=PredictionResponse)
+def predict_risk(tx: Transaction):
+    """
+    Predict credit risk probability for a single transaction.
+    """
+    risk_prob = _score_transactions([tx])[0]
     return PredictionResponse(risk_probability=risk_prob)
+
+
+@app.post("/predict_batch", response_model=BatchResponse)
+def predict_risk_batch(req: BatchRequest):
+    """
+    Predict credit risk probabilities for many transactions in one model call.
+    """
+    probs = _score_transactions(req.transactions)
+    return BatchResponse(risk_probabilities=probs)
@@ -1,12 +1,25 @@
 """Pydantic request/response models for API."""
 
+from typing import List
+
 from pydantic import BaseModel, Field
 
 
 class Transaction(BaseModel):
     TransactionId: str
+    CountryCode: int
     Amount: float
+    Value: float
+    PricingStrategy: int
 
 
 class PredictionResponse(BaseModel):
     risk_probability: float = Field(..., ge=0, le=1)
+
+
+class BatchRequest(BaseModel):
+    transactions: List[Transaction]
+
+
+class BatchResponse(BaseModel):
+    risk_probabilities: List[float]
@@ -1,28 +1,194 @@
 from __future__ import annotations
-from typing import Hashable
+from typing import TYPE_CHECKING, Hashable
 
+import numpy as np
 import pandas as pd
-from sklearn.cluster import KMeans
-from sklearn.preprocessing import StandardScaler
+
+if TYPE_CHECKING:
+    from sklearn.cluster import KMeans
+    from sklearn.preprocessing import StandardScaler
+
+try:
+    from numba import njit
+except ImportError:
+    njit = None
 
 __all__ = ["add_rfm_target"]
 
+_NO_RECENCY = np.iinfo(np.int32).max
+
+# pandas 3 always avoids the copy (copy-on-write) and deprecates the keyword
+_CONCAT_NO_COPY = {"copy": False} if pd.__version__[0] == "2" else {}
+
+
+def _rfm_kernel(codes, days, valid, amount, ngroups):
+    """Scatter per-customer min(days), count and sum(amount) in one pass."""
+    rec = np.full(ngroups, _NO_RECENCY, np.int32)
+    freq = np.zeros(ngroups, np.int64)
+    mon = np.zeros(ngroups, np.float64)
+    for i in range(codes.size):
+        c = codes[i]
+        if c < 0:
+            continue
+        if valid[i]:
+            d = days[i]
+            if d < rec[c]:
+                rec[c] = d
+            freq[c] += 1
+        a = amount[i]
+        if a == a:
+            mon[c] += a
+    return rec, freq, mon
+
+
+if njit is not None:
+    _rfm_kernel = njit(parallel=False, cache=True)(_rfm_kernel)
+
 
 def _compute_rfm(
     df: pd.DataFrame,
     *,
-    id_col: Hashable,
+    codes: np.ndarray,
+    ngroups: int,
+    amount_col: Hashable,
+    datetime_col: Hashable,
+    snapshot_date: pd.Timestamp,
+    datetimes: pd.Series | None = None,
+) -> pd.DataFrame:
+    """Return an RFM frame with one row per customer code ``0..ngroups-1``.
+
+    ``codes`` are the factorized customer ids (``-1`` for missing ids, which
+    are left out). ``datetimes`` optionally overrides ``df[datetime_col]``
+    with an already parsed Series, so callers need not write it back.
+    """
+    if njit is None:
+        return _compute_rfm_groupby(
+            df,
+            codes=codes,
+            ngroups=ngroups,
+            amount_col=amount_col,
+            datetime_col=datetime_col,
+            snapshot_date=snapshot_date,
+            datetimes=datetimes,
+        )
+
+    dt = df[datetime_col] if datetimes is None else datetimes
+    valid = dt.notna().to_numpy()
+    days = (
+        (snapshot_date - dt)
+        .to_numpy()
+        .astype("timedelta64[D]")
+        .astype("int64")
+        .astype("int32")
+    )
+    amount = df[amount_col].to_numpy("float64")
+
+    rec, freq, mon = _rfm_kernel(
+        codes.astype("int64"), days, valid, amount, ngroups
+    )
+
+    recency = pd.Series(rec)
+    if (rec == _NO_RECENCY).any():
+        # customers without a parseable datetime get a missing Recency
+        recency = recency.where(rec != _NO_RECENCY)
+    return pd.DataFrame(
+        {"Recency": recency, "Frequency": freq, "Monetary": mon}
+    )
+
+
+def _compute_rfm_groupby(
+    df: pd.DataFrame,
+    *,
+    codes: np.ndarray,
+    ngroups: int,
     amount_col: Hashable,
     datetime_col: Hashable,
     snapshot_date: pd.Timestamp,
+    datetimes: pd.Series | None = None,
 ) -> pd.DataFrame:
-    """Return an RFM frame indexed by ``id_col``."""
-    rfm = df.groupby(id_col).agg(
-        Recency=(datetime_col, lambda x: (snapshot_date - x.max()).days),
-        Frequency=(datetime_col, "count"),
+    """Pure-pandas fallback for :func:`_compute_rfm` when numba is missing."""
+    # days since snapshot computed once for the whole table; the most recent
+    # transaction per customer is then a plain (cythonized) ``min``
+    dt = df[datetime_col] if datetimes is None else datetimes
+    days = (snapshot_date - dt).dt.days
+    if not days.isna().any():
+        days = days.astype("int32")
+    tmp = df[[amount_col]].assign(_days=days)
+    # categorical key over the codes: -1 (missing id) becomes NaN and is
+    # dropped, and observed=True skips materialising unused categories
+    key = pd.Categorical.from_codes(codes, categories=pd.RangeIndex(ngroups))
+    rfm = tmp.groupby(key, observed=True, sort=False).agg(
+        Recency=("_days", "min"),
+        Frequency=("_days", "count"),
         Monetary=(amount_col, "sum"),
     )
-    return rfm.astype("float64")
+    # order rows by code
+    rfm.index = rfm.index.astype("int64")
+    rfm = rfm.reindex(np.arange(ngroups))
+    return rfm.astype({"Monetary": "float64"})
+
+
+def _take(values: np.ndarray, codes: np.ndarray) -> np.ndarray:
+    """Broadcast per-customer ``values`` back to rows; ``-1`` codes get NaN."""
+    out = values[codes]
+    missing = codes < 0
+    if missing.any():
+        out = out.astype("float64")
+        out[missing] = np.nan
+    return out
+
+
+def _kmeans_clusters(
+    rfm: pd.DataFrame,
+    scaler: StandardScaler | None,
+    kmeans: KMeans,
+) -> tuple[np.ndarray, int]:
+    """Label customers with ``kmeans`` on scaled RFM.
+
+    Returns the labels and the high-risk label (lowest Frequency + Monetary,
+    highest Recency centroid). Estimators that are not fitted yet are fitted
+    in place, so callers can pass them again to skip refitting. A fitted
+    ``kmeans`` requires the ``scaler`` it was fitted with; refitting a fresh
+    scaler per call would silently undo any change in scale.
+    """
+    from sklearn.exceptions import NotFittedError
+    from sklearn.preprocessing import StandardScaler
+    from sklearn.utils.validation import check_is_fitted
+
+    cols = ["Recency", "Frequency", "Monetary"]
+    values = rfm[cols].to_numpy("float64")
+
+    try:
+        check_is_fitted(kmeans)
+        kmeans_fitted = True
+    except NotFittedError:
+        kmeans_fitted = False
+
+    if scaler is None:
+        if kmeans_fitted:
+            raise ValueError(
+                "a fitted kmeans must be passed with the scaler it was "
+                "fitted with"
+            )
+        scaler = StandardScaler()
+    try:
+        check_is_fitted(scaler)
+        rfm_scaled = scaler.transform(values)
+    except NotFittedError:
+        rfm_scaled = scaler.fit_transform(values)
+
+    if kmeans_fitted:
+        labels = kmeans.predict(rfm_scaled)
+    else:
+        labels = kmeans.fit_predict(rfm_scaled)
+
+    centers = pd.DataFrame(kmeans.cluster_centers_, columns=cols)
+    centers["_score"] = (
+        centers["Frequency"].rank(method="average")
+        + centers["Monetary"].rank(method="average")
+        - centers["Recency"].rank(method="average")
+    )
+    return labels, int(centers["_score"].idxmin())
 
 
 def add_rfm_target(
@@ -34,61 +200,95 @@ def add_rfm_target(
     snapshot_date: pd.Timestamp | str | None = None,
     n_clusters: int = 3,
     random_state: int = 42,
+    scaler: StandardScaler | None = None,
+    kmeans: KMeans | None = None,
 ) -> pd.DataFrame:
+    """Add RFM metrics and an ``is_high_risk`` proxy target per customer.
+
+    By default customers are binned into ``n_clusters`` quantiles of a
+    standardized RFM score and the lowest bin is high risk. Passing
+    ``kmeans`` (and ``scaler``) clusters with those estimators instead; they
+    are fitted in place on first use and only applied with
+    ``transform``/``predict`` on later calls. ``scaler`` may be omitted only
+    for a one-off fit of an unfitted ``kmeans``: reusing a fitted ``kmeans``
+    without its scaler, or passing ``scaler`` alone, raises ``ValueError``.
+
+    On the quantile path, customers with no parseable transaction date get
+    a missing score and are flagged high risk. ``random_state`` is unused
+    and kept only for backward compatibility; set it on ``kmeans`` instead.
+    """
 
     if df.empty:
         raise ValueError("Input DataFrame is empty")
+    if scaler is not None and kmeans is None:
+        raise ValueError("scaler is only used together with kmeans")
 
-    out = df.copy()
+    # hash the id column once; RFM rows are indexed by these codes
+    codes, uniques = pd.factorize(df[id_col], sort=False)
+    if len(uniques) == 0:
+        raise ValueError("id_col has no non-missing values")
 
-    # parse datetimes safely
-    out[datetime_col] = pd.to_datetime(out[datetime_col], errors="coerce")
-    if out[datetime_col].dt.tz is not None:
-        out[datetime_col] = out[datetime_col].dt.tz_convert(None)
-    if out[datetime_col].isna().all():
+    # parse datetimes safely into a local Series rather than into df
+    dt = pd.to_datetime(df[datetime_col], errors="coerce")
+    if dt.dt.tz is not None:
+        dt = dt.dt.tz_convert(None)
+    if dt.isna().all():
         raise ValueError("datetime_col could not be parsed to datetime")
 
     # default snapshot date
     if snapshot_date is None:
-        snapshot_date = out[datetime_col].max() + pd.Timedelta(days=1)
+        snapshot_date = dt.max() + pd.Timedelta(days=1)
     snapshot_date = pd.to_datetime(snapshot_date)
 
     # compute RFM
     rfm = _compute_rfm(
-        out,
-        id_col=id_col,
+        df,
+        codes=codes,
+        ngroups=len(uniques),
         amount_col=amount_col,
         datetime_col=datetime_col,
         snapshot_date=snapshot_date,
+        datetimes=dt,
     )
 
-    # adjust clusters if fewer samples than requested clusters
-    n_clusters = min(n_clusters, len(rfm))
+    if kmeans is not None:
+        labels, risk_cluster = _kmeans_clusters(rfm, scaler, kmeans)
+        cluster = labels.astype(np.int8)
+    else:
+        # adjust clusters if fewer samples than requested clusters
+        n_clusters = min(n_clusters, len(rfm))
 
-    # scale & cluster
-    scaler = StandardScaler()
-    rfm_scaled = scaler.fit_transform(rfm)
-    km = KMeans(
-        n_clusters=n_clusters, random_state=random_state, n_init="auto"
-    )
-    rfm["cluster"] = km.fit_predict(rfm_scaled)
+        # composite score on standardized RFM: low Frequency + Monetary and
+        # high Recency score lowest, so the bottom quantile bin is high risk
+        values = rfm[["Recency", "Frequency", "Monetary"]].to_numpy("float64")
+        std = np.nanstd(values, axis=0)
+        std[~(std > 0)] = 1.0
+        z = (values - np.nanmean(values, axis=0)) / std
+        score = pd.Series(z[:, 1] + z[:, 2] - z[:, 0], index=rfm.index)
 
-    # pick high-risk cluster: lowest Frequency + Monetary, highest Recency
-    centers = pd.DataFrame(km.cluster_centers_, columns=rfm.columns[:-1])
-    centers["_score"] = (
-        centers["Frequency"].rank(method="average")
-        + centers["Monetary"].rank(method="average")
-        - centers["Recency"].rank(method="average")
-    )
-    risk_cluster = centers["_score"].idxmin()
+        risk_cluster = 0
+        if score.nunique() > 1:
+            cluster = pd.qcut(
+                score, q=n_clusters, labels=False, duplicates="drop"
+            ).to_numpy()
+        else:
+            cluster = np.zeros(len(rfm), dtype=np.int8)
+        # a NaN score means no parseable transaction date (Frequency 0):
+        # the least engaged customers possible, so they are high risk
+        cluster = np.where(score.isna().to_numpy(), risk_cluster, cluster)
 
-    rfm["is_high_risk"] = (rfm["cluster"] == risk_cluster).astype("int8")
+    # cluster labels stay a local array; only the int8 flag becomes a column
+    rfm["is_high_risk"] = (cluster == risk_cluster).view(np.int8)
 
-    # merge RFM metrics and risk flag back to original df
-    out = out.merge(
-        rfm[["Recency", "Frequency", "Monetary", "is_high_risk"]],
-        left_on=id_col,
-        right_index=True,
-        how="left",
+    # gather RFM metrics and risk flag back to rows by customer code
+    rfm_cols = ["Recency", "Frequency", "Monetary", "is_high_risk"]
+    gathered = pd.DataFrame(
+        {col: _take(rfm[col].to_numpy(), codes) for col in rfm_cols},
+        index=df.index,
     )
-    return out
+    clashing = [col for col in rfm_cols if col in df.columns]
+    if clashing:
+        df = df.drop(columns=clashing)
+    # concat rather than assign: without copy-on-write (pandas 2.x) assign
+    # deep-copies every block of df
+    return pd.concat([df, gathered], axis=1, **_CONCAT_NO_COPY)
@@ -5,9 +5,9 @@ from __future__ import annotations
 import argparse
 import os
 import logging
+import pickle
 from pathlib import Path
 
-import joblib
 import pandas as pd
 from sklearn.ensemble import GradientBoostingClassifier, RandomForestClassifier
 from sklearn.linear_model import LogisticRegression
@@ -128,7 +128,9 @@ def main() -> None:
 
     # save best model locally
     args.model_out.parent.mkdir(parents=True, exist_ok=True)
-    joblib.dump(best_estimator, args.model_out)
+    # plain pickle so the API can unpickle it directly from a memory map
+    with open(args.model_out, "wb") as f:
+        pickle.dump(best_estimator, f, protocol=pickle.HIGHEST_PROTOCOL)
     logger.info("Saved best model to %s", args.model_out)
 
 
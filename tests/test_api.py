@@ -0,0 +1,240 @@
+import pickle
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
+from src.api import main
+
+FEATURES = ("CountryCode", "Amount", "Value", "PricingStrategy")
+
+
+def _payload(amount: float) -> dict:
+    return {
+        "TransactionId": f"T{amount:g}",
+        "CountryCode": 256,
+        "Amount": amount,
+        "Value": abs(amount),
+        "PricingStrategy": 2,
+    }
+
+
+class ProbaModel:
+    """Classifier stub whose risk is Amount / 1000."""
+
+    def __init__(self):
+        self.seen = []
+
+    def predict_proba(self, X):
+        self.seen.append(X)
+        risk = np.asarray(X, dtype=np.float64)[:, 1] / 1000.0
+        return np.column_stack([1 - risk, risk])
+
+
+class NamedProbaModel(ProbaModel):
+    """Stub fitted on a DataFrame, so it exposes ``feature_names_in_``."""
+
+    feature_names_in_ = np.array(FEATURES, dtype=object)
+
+
+@pytest.fixture
+def client(monkeypatch):
+    """Return a factory serving ``model`` without running startup."""
+
+    def _client(model, ort_sess=None):
+        state = main.app.state
+        monkeypatch.setattr(state, "model", model, raising=False)
+        monkeypatch.setattr(state, "FEATURE_COLS", FEATURES, raising=False)
+        monkeypatch.setattr(state, "ort_sess", ort_sess, raising=False)
+        return TestClient(main.app)
+
+    return _client
+
+
+def test_predict_and_predict_batch_agree(client):
+    """Test single and batch scoring return the same probabilities."""
+    api = client(ProbaModel())
+    amounts = [100.0, 250.0, 900.0]
+
+    single = [
+        api.post("/predict", json=_payload(a)).json()["risk_probability"]
+        for a in amounts
+    ]
+    resp = api.post(
+        "/predict_batch",
+        json={"transactions": [_payload(a) for a in amounts]},
+    )
+
+    assert resp.status_code == 200
+    assert resp.json()["risk_probabilities"] == single
+    assert single == pytest.approx([0.1, 0.25, 0.9])
+
+
+def test_predict_batch_empty(client):
+    """Test an empty batch returns an empty list without calling the model."""
+    model = ProbaModel()
+    resp = client(model).post("/predict_batch", json={"transactions": []})
+
+    assert resp.status_code == 200
+    assert resp.json() == {"risk_probabilities": []}
+    assert model.seen == []
+
+
+def test_named_feature_model_gets_dataframe(client):
+    """Test models fitted on named columns receive a DataFrame."""
+    named, plain = NamedProbaModel(), ProbaModel()
+
+    client(named).post("/predict", json=_payload(100.0))
+    client(plain).post("/predict", json=_payload(100.0))
+
+    assert isinstance(named.seen[-1], pd.DataFrame)
+    assert list(named.seen[-1].columns) == list(FEATURES)
+    assert isinstance(plain.seen[-1], np.ndarray)
+
+
+class SeriesPredictModel:
+    """pyfunc-style stub: no predict_proba, ``predict`` returns a Series."""
+
+    def predict(self, X):
+        risk = np.asarray(X, dtype=np.float64)[:, 1] / 1000.0
+        risk.flags.writeable = False
+        return pd.Series(risk, copy=False)
+
+
+def test_predict_only_model_returning_read_only_series(client):
+    """Test clamping does not write into a read-only model output."""
+    resp = client(SeriesPredictModel()).post(
+        "/predict_batch",
+        json={"transactions": [_payload(100.0), _payload(2000.0)]},
+    )
+
+    assert resp.status_code == 200
+    assert resp.json()["risk_probabilities"] == pytest.approx([0.1, 1.0])
+
+
+class WideArrayModel(ProbaModel):
+    """Stub fitted on an unnamed 6-column array."""
+
+    n_features_in_ = 6
+
+
+def test_load_model_rejects_feature_count_mismatch(monkeypatch):
+    """Test startup fails when the model width differs from Transaction."""
+    state = main.app.state
+    monkeypatch.setattr(state, "model", None, raising=False)
+    monkeypatch.setattr(state, "FEATURE_COLS", (), raising=False)
+    monkeypatch.setattr(state, "model_source", None, raising=False)
+    monkeypatch.setattr(
+        main, "get_model", lambda: (WideArrayModel(), "stub")
+    )
+
+    with pytest.raises(RuntimeError, match="6 features"):
+        main.load_model()
+
+
+def test_onnx_session_matches_predict_proba():
+    """Test the converted ONNX model scores like sklearn within float32."""
+    pytest.importorskip("onnxruntime")
+    pytest.importorskip("skl2onnx")
+    from sklearn.linear_model import LogisticRegression
+
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(200, len(FEATURES)))
+    y = (X[:, 1] + 0.5 * X[:, 2] > 0).astype(int)
+    model = LogisticRegression().fit(X, y)
+
+    sess = main._build_onnx_session(model, len(FEATURES), None)
+
+    assert sess is not None
+    X32 = X[:20].astype(np.float32)
+    np.testing.assert_allclose(
+        main._onnx_probs(sess, X32),
+        model.predict_proba(X32)[:, 1],
+        atol=1e-5,
+    )
+
+
+class _Input:
+    name = "X"
+
+
+class BadShapeSession:
+    """ONNX stub whose probability output has the wrong shape."""
+
+    def get_inputs(self):
+        return [_Input()]
+
+    def run(self, output_names, feeds):
+        n = feeds["X"].shape[0]
+        return [np.zeros(n), np.zeros((n, 3), dtype=np.float32)]
+
+
+def test_broken_onnx_session_falls_back_and_is_cleared(client):
+    """Test a failing ONNX session falls back to sklearn and is dropped."""
+    api = client(ProbaModel(), ort_sess=BadShapeSession())
+
+    resp = api.post("/predict", json=_payload(300.0))
+
+    assert resp.status_code == 200
+    assert resp.json()["risk_probability"] == pytest.approx(0.3)
+    assert main.app.state.ort_sess is None
+
+
+def _dump_pickle(protocol):
+    def dump(obj, path):
+        with open(path, "wb") as f:
+            pickle.dump(obj, f, protocol=protocol)
+
+    return dump
+
+
+def _dump_joblib(compress):
+    def dump(obj, path):
+        joblib.dump(obj, path, compress=compress)
+
+    return dump
+
+
+@pytest.mark.parametrize(
+    "dump",
+    [
+        _dump_pickle(0),
+        _dump_pickle(5),
+        _dump_joblib(0),
+        _dump_joblib(("zlib", 3)),
+        _dump_joblib(("gzip", 3)),
+        _dump_joblib(("xz", 3)),
+        _dump_joblib(("lzma", 3)),
+    ],
+    ids=[
+        "pickle-0",
+        "pickle-5",
+        "joblib",
+        "joblib-zlib",
+        "joblib-gzip",
+        "joblib-xz",
+        "joblib-lzma",
+    ],
+)
+def test_load_local_model_formats(tmp_path, dump):
+    """Test plain pickles and joblib dumps all load back intact."""
+    obj = {"coef": np.arange(10.0), "name": "model"}
+    path = tmp_path / "model.pkl"
+    dump(obj, path)
+
+    loaded = main._load_local_model(path)
+
+    assert loaded["name"] == "model"
+    np.testing.assert_array_equal(loaded["coef"], obj["coef"])
+
+
+def test_load_local_model_shipped_artifact():
+    """Test the committed joblib artifact loads through the same helper."""
+    pytest.importorskip("sklearn")
+    path = Path(__file__).resolve().parents[1] / "artifacts" / "best_model.pkl"
+
+    model = main._load_local_model(path)
+
+    assert list(model.feature_names_in_) == list(FEATURES)
@@ -1,6 +1,7 @@
 from pathlib import Path
 
 import pandas as pd
+import pytest
 from src.data_processing import engineer_features
 from src.utils.model_utils import compute_metrics
 
@@ -39,3 +40,22 @@ def test_compute_metrics():
     # Check all metric values are between 0 and 1
     for v in metrics.values():
         assert 0.0 <= v <= 1.0, "Metric values should be between 0 and 1"
+
+
+def test_compute_metrics_confusion_counts():
+    """Test threshold metrics match hand-computed confusion matrix values."""
+    y_true = [0, 1, 1, 0, 1]
+    y_prob = [0.7, 0.8, 0.3, 0.2, 0.9]  # tp=2, fp=1, fn=1, tn=1
+
+    metrics = compute_metrics(y_true, y_prob)
+
+    assert metrics["accuracy"] == pytest.approx(3 / 5)
+    assert metrics["precision"] == pytest.approx(2 / 3)
+    assert metrics["recall"] == pytest.approx(2 / 3)
+    assert metrics["f1"] == pytest.approx(2 / 3)
+
+
+def test_compute_metrics_rejects_non_binary_labels():
+    """Test labels outside {0, 1} raise instead of skewing the counts."""
+    with pytest.raises(ValueError):
+        compute_metrics([1, 2, 2, 1], [0.1, 0.8, 0.6, 0.4])
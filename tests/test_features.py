@@ -1,4 +1,8 @@
 import pandas as pd
+import pytest
+from sklearn.cluster import KMeans
+from sklearn.preprocessing import StandardScaler
+import src.features.rfm_target as rt
 from src.features.rfm_target import add_rfm_target
 
 
@@ -47,3 +51,184 @@ def test_add_rfm_target_basic():
     assert (
         rfm_df["is_high_risk"].sum() >= 1
     ), "At least one customer should be high risk"
+
+
+def test_add_rfm_target_flags_least_engaged_customer():
+    """Test the stalest, lowest-spend customer lands in the high-risk bin."""
+    data = pd.DataFrame(
+        {
+            "CustomerId": [1, 1, 1, 2, 2, 3],
+            "TransactionStartTime": pd.to_datetime(
+                [
+                    "2025-12-10",
+                    "2025-12-12",
+                    "2025-12-15",
+                    "2025-12-05",
+                    "2025-12-14",
+                    "2025-10-01",
+                ]
+            ),
+            "Amount": [500, 400, 300, 100, 150, 10],
+        }
+    )
+
+    rfm_df = add_rfm_target(data, n_clusters=3)
+    flags = rfm_df.groupby("CustomerId")["is_high_risk"].first()
+
+    assert flags.loc[3] == 1, "Least engaged customer should be high risk"
+    assert flags.loc[1] == 0, "Most engaged customer should not be high risk"
+
+
+def test_add_rfm_target_reuses_fitted_kmeans():
+    """Test passed estimators are fitted once and reused on later calls."""
+    data = pd.DataFrame(
+        {
+            "CustomerId": [1, 1, 2, 3, 4],
+            "TransactionStartTime": pd.to_datetime(
+                [
+                    "2025-12-10",
+                    "2025-12-15",
+                    "2025-12-14",
+                    "2025-10-01",
+                    "2025-09-20",
+                ]
+            ),
+            "Amount": [500, 300, 250, 10, 20],
+        }
+    )
+    scaler = StandardScaler()
+    kmeans = KMeans(n_clusters=2, random_state=42, n_init="auto")
+
+    first = add_rfm_target(data, scaler=scaler, kmeans=kmeans)
+    means = scaler.mean_.copy()
+    centers = kmeans.cluster_centers_.copy()
+
+    # different data: a refit would move both the scaler and the centroids
+    shifted = data.assign(
+        Amount=data["Amount"] * 10,
+        TransactionStartTime=data["TransactionStartTime"]
+        - pd.Timedelta(days=30),
+    )
+    second = add_rfm_target(
+        shifted,
+        snapshot_date="2025-12-16",
+        scaler=scaler,
+        kmeans=kmeans,
+    )
+
+    assert (scaler.mean_ == means).all(), "StandardScaler was refitted"
+    assert (kmeans.cluster_centers_ == centers).all(), "KMeans was refitted"
+    assert first["is_high_risk"].isin([0, 1]).all()
+    assert second["is_high_risk"].isin([0, 1]).all()
+
+
+def test_add_rfm_target_rejects_scaler_without_kmeans():
+    """Test a scaler passed without kmeans raises instead of being ignored."""
+    data = pd.DataFrame(
+        {
+            "CustomerId": [1, 2],
+            "TransactionStartTime": pd.to_datetime(
+                ["2025-12-01", "2025-12-10"]
+            ),
+            "Amount": [100, 200],
+        }
+    )
+
+    with pytest.raises(ValueError):
+        add_rfm_target(data, scaler=StandardScaler())
+
+
+def test_compute_rfm_kernel_matches_groupby_fallback(monkeypatch):
+    """Test the numba kernel and the pandas fallback produce the same RFM."""
+    df = pd.DataFrame(
+        {
+            "CustomerId": ["a", "a", "b", None, "c", "c"],
+            "TransactionStartTime": pd.to_datetime(
+                [
+                    "2025-12-01",
+                    "2025-12-05",
+                    None,
+                    "2025-12-03",
+                    "2025-11-01",
+                    None,
+                ]
+            ),
+            "Amount": [10.0, 20.0, 5.0, 7.0, 3.0, 4.0],
+        }
+    )
+    codes, uniques = pd.factorize(df["CustomerId"], sort=False)
+    kwargs = dict(
+        codes=codes,
+        ngroups=len(uniques),
+        amount_col="Amount",
+        datetime_col="TransactionStartTime",
+        snapshot_date=pd.Timestamp("2025-12-10"),
+    )
+
+    # any non-None njit selects the kernel path (compiled or plain Python)
+    monkeypatch.setattr(rt, "njit", object())
+    kernel = rt._compute_rfm(df, **kwargs)
+    monkeypatch.setattr(rt, "njit", None)
+    fallback = rt._compute_rfm(df, **kwargs)
+
+    pd.testing.assert_frame_equal(
+        kernel.reset_index(drop=True),
+        fallback.reset_index(drop=True),
+        check_dtype=False,
+    )
+    # customer "b" only has a NaT transaction
+    assert pd.isna(kernel.loc[1, "Recency"])
+    assert kernel.loc[1, "Frequency"] == 0
+    assert kernel["Monetary"].tolist() == [30.0, 5.0, 7.0]
+
+
+def test_add_rfm_target_flags_customer_without_valid_dates():
+    """Test a customer whose datetimes all fail to parse is high risk."""
+    data = pd.DataFrame(
+        {
+            "CustomerId": [1, 1, 2, 3, 4],
+            "TransactionStartTime": [
+                "2025-12-10",
+                "2025-12-15",
+                "2025-12-14",
+                "2025-12-01",
+                "not a date",
+            ],
+            "Amount": [500, 300, 250, 100, 1000],
+        }
+    )
+
+    rfm_df = add_rfm_target(data, n_clusters=2)
+    flags = rfm_df.groupby("CustomerId")["is_high_risk"].first()
+
+    assert rfm_df.loc[4, "Frequency"] == 0
+    assert flags.loc[4] == 1, "Customer without valid dates should be flagged"
+
+
+def test_add_rfm_target_rejects_fitted_kmeans_without_scaler():
+    """Test reusing a fitted kmeans without its scaler raises."""
+    data = pd.DataFrame(
+        {
+            "CustomerId": [1, 1, 2, 3, 4],
+            "TransactionStartTime": pd.to_datetime(
+                [
+                    "2025-12-10",
+                    "2025-12-15",
+                    "2025-12-14",
+                    "2025-10-01",
+                    "2025-09-20",
+                ]
+            ),
+            "Amount": [500, 300, 250, 10, 20],
+        }
+    )
+    kmeans = KMeans(n_clusters=2, random_state=42, n_init="auto")
+
+    # a one-off fit without a scaler is fine
+    first = add_rfm_target(data, kmeans=kmeans)
+    assert first["is_high_risk"].isin([0, 1]).all()
+
+    # reuse would standardize with a fresh scaler and undo the rescaling
+    rescaled = data.assign(Amount=data["Amount"] * 100)
+    with pytest.raises(ValueError):
+        add_rfm_target(rescaled, kmeans=kmeans)